@@ -17,6 +17,7 @@ from litellm import completion
 from agent.config import MODEL, TEMPERATURE, ENABLE_AUTOMERGE, ENDPOINT_URL, BEARER_TOKEN, REPO_ROOT
 from agent.prompts import SYSTEM_PROMPT
 from agent.tools import ALL_TOOLS, execute_tool
+from agent.tools.llm_log_analyzer import rotate_llm_log
 
 #TODO: Fix object formats
 warnings.filterwarnings("ignore", category=UserWarning, module="pydantic")
@@ -226,6 +227,7 @@ def main():
 
                 with open(LLM_LOG, "a", encoding="utf-8") as f:
                     f.write(json.dumps(log_entry) + "\n")
+                rotate_llm_log(LLM_LOG)
 
                 messages.append(msg)
 
@@ -8,21 +8,24 @@ from .reliability import RELIABILITY_TOOLS, execute_reliability_tool
 from .shell import SHELL_TOOLS, execute_shell_tool
 from .memory import MEMORY_TOOL, execute_memory_tool
 
-ALL_TOOLS = SHELL_TOOLS
-ALL_TOOLS.extend(GITHUB_TOOLS) # extend with other modules later
-ALL_TOOLS.extend(LLM_LOG_TOOLS)
-ALL_TOOLS.extend(RELIABILITY_TOOLS)
-ALL_TOOLS.extend([MEMORY_TOOL])
+# Build a new list: extending SHELL_TOOLS in place aliased it to ALL_TOOLS
+# and re-appended every schema on each reload.
+ALL_TOOLS = [*SHELL_TOOLS, *GITHUB_TOOLS, *LLM_LOG_TOOLS, *RELIABILITY_TOOLS, MEMORY_TOOL]
+assert len({t["function"]["name"] for t in ALL_TOOLS}) == len(ALL_TOOLS), "duplicate tool names"
+
+# name -> handler, built once at import so dispatch is a single dict lookup.
+_HANDLERS = {}
+for _tools, _handler in [
+    (SHELL_TOOLS, execute_shell_tool),
+    (GITHUB_TOOLS, execute_github_tool),
+    (LLM_LOG_TOOLS, execute_llm_log_tool),
+    (RELIABILITY_TOOLS, execute_reliability_tool),
+    ([MEMORY_TOOL], execute_memory_tool),
+]:
+    _HANDLERS.update({t["function"]["name"]: _handler for t in _tools})
 
 def execute_tool(name: str, args: dict, current_goal_id=None):
-    if name == "write_memory_file":
-        return execute_memory_tool("write_memory_file", args)
-    elif name in [t["function"]["name"] for t in RELIABILITY_TOOLS]:
-        return execute_reliability_tool(name, args, current_goal_id)
-    elif name in [t["function"]["name"] for t in LLM_LOG_TOOLS]:
-        return execute_llm_log_tool(name, args, current_goal_id)
-    elif name in [t["function"]["name"] for t in SHELL_TOOLS]:
-        return execute_shell_tool(name, args, current_goal_id)
-    elif name in [t["function"]["name"] for t in GITHUB_TOOLS]:
-        return execute_github_tool(name, args, current_goal_id)
-    return f"Tool '{name}' not implemented in any module yet."
+    handler = _HANDLERS.get(name)
+    if handler is None:
+        return f"Tool '{name}' not implemented in any module yet."
+    return handler(name, args, current_goal_id)
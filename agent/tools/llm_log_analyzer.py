@@ -4,13 +4,28 @@ Tools for the agent to query and summarize its own LLM call history.
 Reads from memory/llm-calls.log.jsonl (JSON Lines format).
 """
 
+import heapq
 import json
+import time
+from collections import Counter
 from pathlib import Path
-from datetime import datetime, timedelta
-from typing import Dict, Any, Optional, List
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Any, Optional, List
+
+try:
+    import orjson  # optional, several times faster than json for per-line decoding
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
 
 LLM_LOG_PATH = Path.home() / "makobot" / "memory" / "llm-calls.log.jsonl"
 
+# Below this size a plain forward scan is cheaper than seeking backwards.
+TAIL_SCAN_MIN_BYTES = 1024 * 1024
+
+# The live log is moved aside as <name>.<epoch_ns> once it grows past this.
+MAX_LOG_BYTES = 32 * 1024 * 1024
+
 def execute_llm_log_tool(tool_name: str, args: Dict[str, Any], current_goal_id: Optional[int] = None) -> str:
     """
     Dispatcher for LLM log analysis tools.
@@ -31,76 +46,258 @@ def execute_llm_log_tool(tool_name: str, args: Dict[str, Any], current_goal_id:
 
 # ─── Core Functions ─────────────────────────────────────────────────────────
 
-def load_recent_logs(days_back: int = 7, limit: int = 200) -> List[Dict]:
-    """Load the most recent log entries from JSONL file."""
-    if not LLM_LOG_PATH.exists():
-        return []
+def _parse_timestamp(value: str) -> datetime:
+    """Parse an ISO 8601 log timestamp, treating naive values as UTC."""
+    ts = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return ts
 
-    cutoff = datetime.utcnow() - timedelta(days=days_back)
-    logs = []
 
-    with open(LLM_LOG_PATH, "r", encoding="utf-8") as f:
+_TIMESTAMP_KEY = b'"timestamp"'
+
+
+def _date_before(line: bytes, day: bytes) -> bool:
+    """
+    Cheap pre-parse check: True if the line's timestamp date (YYYY-MM-DD)
+    sorts before `day`. ISO 8601 dates compare correctly as bytes.
+    """
+    i = line.find(_TIMESTAMP_KEY)
+    if i < 0:
+        return False
+    start = line.find(b'"', i + len(_TIMESTAMP_KEY)) + 1
+    return start > 0 and line[start:start + 10] < day
+
+
+def _skip_before(cutoff: datetime) -> bytes:
+    """Date bound for _date_before; a day of slack covers any UTC offset, so no match is dropped."""
+    return (cutoff - timedelta(days=1)).date().isoformat().encode()
+
+
+def _parse_line(line: bytes):
+    """Decode one JSONL line into (timestamp, entry), or None if malformed."""
+    try:
+        entry = _loads(line)
+        return _parse_timestamp(entry["timestamp"]), entry
+    except (KeyError, TypeError, ValueError):  # JSONDecodeError is a ValueError
+        return None
+
+
+def _iter_entries(lines, cutoff: datetime):
+    """Lazily parse log lines, yielding (timestamp, entry) pairs newer than cutoff."""
+    skip_before = _skip_before(cutoff)
+    for line in lines:
+        if _date_before(line, skip_before):
+            continue
+        parsed = _parse_line(line)
+        if parsed is not None and parsed[0] >= cutoff:
+            yield parsed
+
+
+def _tail_lines(path: Path, chunk: int = 65536):
+    """Yield complete lines of a file in reverse order, reading backwards in blocks."""
+    with open(path, "rb") as f:
+        pos = f.seek(0, 2)
+        remainder = b""
+        while pos > 0:
+            step = min(chunk, pos)
+            pos -= step
+            f.seek(pos)
+            lines = (f.read(step) + remainder).split(b"\n")
+            # The first piece may be the tail of a line that starts in an earlier block
+            remainder = lines.pop(0)
+            for line in reversed(lines):
+                if line:
+                    yield line
+        if remainder:
+            yield remainder
+
+
+def rotate_llm_log(path: Optional[Path] = None) -> Optional[Path]:
+    """
+    Rotate the log to <name>.<epoch_ns> once it exceeds MAX_LOG_BYTES, so the
+    live file (and every scan of it) stays small. Call after appending.
+    Best-effort: returns the archive path if the file was rotated, None if it
+    did not need to be or could not be (the next call simply retries).
+    """
+    path = path or LLM_LOG_PATH
+    try:
+        if path.stat().st_size <= MAX_LOG_BYTES:
+            return None
+        # Never overwrite an earlier archive, even for rotations in the same tick
+        stamp = time.time_ns()
+        while path.with_name(f"{path.name}.{stamp}").exists():
+            stamp += 1
+        archive = path.with_name(f"{path.name}.{stamp}")
+        path.rename(archive)
+    except OSError:
+        return None
+    return archive
+
+
+def _log_files() -> List[Path]:
+    """The live log followed by rotated archives, newest first."""
+    archives = []
+    for p in LLM_LOG_PATH.parent.glob(LLM_LOG_PATH.name + ".*"):
+        suffix = p.name.rsplit(".", 1)[1]
+        if suffix.isdigit():
+            archives.append((int(suffix), p))
+    files = [LLM_LOG_PATH] if LLM_LOG_PATH.exists() else []
+    return files + [p for _, p in sorted(archives, reverse=True)]
+
+
+def _earliest_timestamp(path: Path) -> Optional[datetime]:
+    """Timestamp of the first well-formed entry in a log file."""
+    with open(path, "rb") as f:
         for line in f:
-            try:
-                entry = json.loads(line.strip())
-                ts = datetime.fromisoformat(entry["timestamp"].replace("Z", "+00:00"))
-                if ts >= cutoff:
-                    logs.append(entry)
-            except (json.JSONDecodeError, KeyError, ValueError):
-                continue  # skip malformed lines
+            parsed = _parse_line(line)
+            if parsed is not None:
+                return parsed[0]
+    return None
+
+
+def _iter_log_file(path: Path, cutoff: datetime, limit: int):
+    """Yield up to `limit` entries of one log file newer than cutoff, most recent first."""
+    if path.stat().st_size < TAIL_SCAN_MIN_BYTES:
+        with open(path, "rb") as f:
+            # Small file: one read + split beats per-line readline calls
+            lines = f.read().split(b"\n")
+        # Bounded heap: only `limit` entries are ever held in memory.
+        newest = heapq.nlargest(limit, _iter_entries(lines, cutoff), key=lambda pair: pair[0])
+        for _, entry in newest:
+            yield entry
+        return
+
+    # The log is append-only, so reading from the end yields newest entries
+    # first and we can stop at the first one older than the cutoff.
+    count = 0
+    skip_before = _skip_before(cutoff)
+    for line in _tail_lines(path):
+        if count >= limit or _date_before(line, skip_before):
+            return
+        parsed = _parse_line(line)
+        if parsed is None:
+            continue  # skip malformed lines
+        ts, entry = parsed
+        if ts < cutoff:
+            return
+        count += 1
+        yield entry
+
+
+def _iter_recent_entries(days_back: int = 7, limit: int = 200):
+    """Yield up to `limit` log entries newer than `days_back` days, most recent first."""
+    cutoff = datetime.now(timezone.utc) - timedelta(days=days_back)
+    remaining = limit
+
+    for path in _log_files():
+        try:
+            for entry in _iter_log_file(path, cutoff, remaining):
+                remaining -= 1
+                yield entry
+            # Older archives only matter if the window reaches past this file's start
+            if remaining <= 0:
+                return
+            earliest = _earliest_timestamp(path)
+        except OSError:
+            continue  # rotated away underneath us
+        if earliest is not None and earliest < cutoff:
+            return
 
-    # Most recent first
-    logs.sort(key=lambda x: x["timestamp"], reverse=True)
-    return logs[:limit]
 
+def load_recent_logs(days_back: int = 7, limit: int = 200) -> List[Dict]:
+    """Load the most recent log entries from JSONL file."""
+    return list(_iter_recent_entries(days_back, limit))
 
-def summarize_llm_logs(days_back: int = 7, limit: int = 50) -> str:
-    """Generate a human-readable summary of recent LLM calls."""
-    logs = load_recent_logs(days_back, limit)
 
-    if not logs:
-        return f"No LLM calls found in the last {days_back} days."
+def _tool_call_count(entry: Dict) -> int:
+    """Number of tool calls in an entry (the driver logs the list of calls)."""
+    tool_calls = entry.get("tool_calls") or 0
+    return len(tool_calls) if isinstance(tool_calls, list) else tool_calls
+
 
-    total_calls = len(logs)
-    models = {}
+def summarize_llm_logs(days_back: int = 7, limit: int = 50) -> str:
+    """Generate a human-readable summary of recent LLM calls."""
+    total_calls = 0
+    models = Counter()
     total_input_tokens = 0
     total_output_tokens = 0
     total_duration = 0
     success_count = 0
     tool_call_count = 0
-
-    for entry in logs:
-        model = entry.get("model", "unknown")
-        models[model] = models.get(model, 0) + 1
+    latest = None
+
+    # Single streaming pass: entries arrive newest first and are never collected.
+    for entry in _iter_recent_entries(days_back, limit):
+        if latest is None:
+            latest = entry
+        total_calls += 1
+        models[entry.get("model", "unknown")] += 1
         total_input_tokens += entry.get("input_tokens", 0) or 0
         total_output_tokens += entry.get("output_tokens", 0) or 0
-        total_duration += entry.get("duration_sec", 0)
+        total_duration += entry.get("duration_sec", 0) or 0
         if entry.get("success", False):
             success_count += 1
-        tool_call_count += entry.get("tool_calls", 0)
+        tool_call_count += _tool_call_count(entry)
+
+    if not total_calls:
+        return f"No LLM calls found in the last {days_back} days."
+
+    avg_duration = total_duration / total_calls
+    success_rate = success_count / total_calls * 100
+
+    parts = [
+        f"LLM Call Summary (last {days_back} days, up to {total_calls} calls):\n\n",
+        f"• Total calls: {total_calls}\n",
+        f"• Success rate: {success_rate:.1f}%\n",
+        f"• Average duration: {avg_duration:.2f} seconds\n",
+        f"• Total input tokens: {total_input_tokens:,}\n",
+        f"• Total output tokens: {total_output_tokens:,}\n",
+        f"• Total tool calls made: {tool_call_count}\n\n",
+        "Models used:\n",
+    ]
+    for m, count in models.most_common():
+        parts.append(f"  - {m}: {count} calls\n")
+
+    parts.append(
+        f"\nMost recent call ({latest['timestamp']}):\n"
+        f"  Model: {latest.get('model')}\n"
+        f"  Prompt snippet: {latest.get('user_prompt_snippet', '—')}\n"
+        f"  Response snippet: {latest.get('response_snippet', '—')}\n"
+    )
 
-    avg_duration = total_duration / total_calls if total_calls > 0 else 0
-    success_rate = (success_count / total_calls * 100) if total_calls > 0 else 0
+    return "".join(parts)
 
-    summary = f"LLM Call Summary (last {days_back} days, up to {total_calls} calls):\n\n"
-    summary += f"• Total calls: {total_calls}\n"
-    summary += f"• Success rate: {success_rate:.1f}%\n"
-    summary += f"• Average duration: {avg_duration:.2f} seconds\n"
-    summary += f"• Total input tokens: {total_input_tokens:,}\n"
-    summary += f"• Total output tokens: {total_output_tokens:,}\n"
-    summary += f"• Total tool calls made: {tool_call_count}\n\n"
-    summary += "Models used:\n"
-    for m, count in sorted(models.items(), key=lambda x: x[1], reverse=True):
-        summary += f"  - {m}: {count} calls\n"
 
-    if logs:
-        latest = logs[0]
-        summary += f"\nMost recent call ({latest['timestamp']}):\n"
-        summary += f"  Model: {latest.get('model')}\n"
-        summary += f"  Prompt snippet: {latest.get('user_prompt_snippet', '—')}\n"
-        summary += f"  Response snippet: {latest.get('response_snippet', '—')}\n"
+def _compile_filters(filter_expr: str) -> List[Callable[[Dict], bool]]:
+    """
+    Compile a filter expression into per-entry predicates, parsing it only once.
+    Supports model:X, success:true/false, duration>N and tool_calls>N
+    (the "key:>N" spelling is accepted too). Unknown terms are ignored.
+    """
+    predicates = []
 
-    return summary
+    for term in filter_expr.lower().split():
+        if ">" in term:
+            key, _, val = term.partition(">")
+            key = key.rstrip(":")
+            try:
+                thresh = float(val)
+            except ValueError:
+                continue
+            if key == "duration":
+                predicates.append(lambda e, t=thresh: (e.get("duration_sec") or 0) > t)
+            elif key == "tool_calls":
+                predicates.append(lambda e, t=thresh: _tool_call_count(e) > t)
+        elif ":" in term:
+            key, _, val = term.partition(":")
+            if key == "model":
+                predicates.append(lambda e, v=val: v in (e.get("model") or "").lower())
+            elif key == "success":
+                wanted = val != "false"
+                predicates.append(lambda e, w=wanted: bool(e.get("success", True)) == w)
+
+    return predicates
 
 
 def query_llm_logs(filter_expr: str = "", limit: int = 20) -> str:
@@ -117,30 +314,10 @@ def query_llm_logs(filter_expr: str = "", limit: int = 20) -> str:
         return "No logs available."
 
     results = []
-
-    # Very simple keyword filtering (expand later with real query parser if needed)
-    filters = filter_expr.lower().split()
+    predicates = _compile_filters(filter_expr)
 
     for entry in logs[:limit * 5]:  # overscan then slice
-        match = True
-
-        for f in filters:
-            if ":" in f:
-                key, val = f.split(":", 1)
-                if key == "model" and val not in entry.get("model", "").lower():
-                    match = False
-                elif key == "duration" and ">" in val:
-                    thresh = float(val.split(">")[1])
-                    if entry.get("duration_sec", 0) <= thresh:
-                        match = False
-            elif "success:false" in f and entry.get("success", True):
-                match = False
-            elif "tool_calls" in f and ">" in f:
-                thresh = int(f.split(">")[1])
-                if entry.get("tool_calls", 0) <= thresh:
-                    match = False
-
-        if match:
+        if all(p(entry) for p in predicates):
             results.append(entry)
             if len(results) >= limit:
                 break
@@ -148,16 +325,18 @@ def query_llm_logs(filter_expr: str = "", limit: int = 20) -> str:
     if not results:
         return f"No matching LLM calls found for filter: '{filter_expr}'"
 
-    output = f"Found {len(results)} matching LLM calls:\n\n"
+    parts = [f"Found {len(results)} matching LLM calls:\n\n"]
     for i, e in enumerate(results, 1):
-        output += f"{i}. {e['timestamp']} | {e.get('model')} | "
-        output += f"dur={e.get('duration_sec','—')}s | "
-        output += f"tools={e.get('tool_calls',0)} | "
-        output += f"in={e.get('input_tokens','—'):,} out={e.get('output_tokens','—'):,}\n"
-        output += f"   Prompt: {e.get('user_prompt_snippet','—')}\n"
-        output += f"   Response: {e.get('response_snippet','—')}\n\n"
-
-    return output
+        parts.append(
+            f"{i}. {e['timestamp']} | {e.get('model')} | "
+            f"dur={e.get('duration_sec','—')}s | "
+            f"tools={e.get('tool_calls',0)} | "
+            f"in={e.get('input_tokens','—'):,} out={e.get('output_tokens','—'):,}\n"
+            f"   Prompt: {e.get('user_prompt_snippet','—')}\n"
+            f"   Response: {e.get('response_snippet','—')}\n\n"
+        )
+
+    return "".join(parts)
 
 
 # ─── Tool Schemas ──────────────────────────────────────────────────────────
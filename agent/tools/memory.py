@@ -3,6 +3,10 @@
 Memory tools for the agent.
 """
 
+from pathlib import Path
+
+from .llm_log_analyzer import rotate_llm_log
+
 def execute_memory_tool(tool_name: str, args: dict[str, any], current_goal_id: int = None) -> str:
     """
     Dispatcher for memory-related tools.
@@ -27,6 +31,8 @@ def write_memory_file(path: str, content: str) -> str:
     try:
         with open(f"memory/{path}", mode) as f:
             f.write(content)
+        if path == "llm-calls.log.jsonl":
+            rotate_llm_log(Path("memory") / path)
         return f"Wrote to memory/{path} successfully"
     except Exception as e:
         return f"Write error: {str(e)}"
@@ -1,14 +1,33 @@
 # agent/tools/reliability.py
 """
 Tools for recording and querying the reliability of tool calls.
-Stores data in agent-memory/tool-reliability.json
+Stores data in agent-memory/tool-reliability.json, with new records appended
+to tool-reliability.events.jsonl and periodically compacted into the JSON.
 """
 
+import atexit
+import functools
 import json
+import os
 from pathlib import Path
 from typing import Dict, Any, Optional
 
+try:
+    import orjson  # optional, noticeably faster to parse
+except ImportError:
+    orjson = None
+
 RELIABILITY_FILE = Path.home() / "makobot" / "memory" / "tool-reliability.json"
+EVENTS_FILE = Path.home() / "makobot" / "memory" / "tool-reliability.events.jsonl"
+
+# Fold the event log into RELIABILITY_FILE once it holds this many records.
+COMPACT_EVERY = 1000
+
+# Only the most recent notes per tool are kept.
+MAX_NOTES = 32
+
+# Aggregate of snapshot + replayed events, valid while both files' stats are unchanged.
+_cache = {"stat": None, "data": None, "events": 0}
 
 def execute_reliability_tool(tool_name: str, args: Dict[str, Any], current_goal_id: Optional[int] = None) -> str:
     """
@@ -33,13 +52,27 @@ def execute_reliability_tool(tool_name: str, args: Dict[str, Any], current_goal_
 
 # ─── Core Functions ─────────────────────────────────────────────────────────
 
-def load_reliability_data() -> Dict:
-    """Load or initialize the reliability JSON."""
+def _file_stat(path: Path):
+    """Cheap change marker for a file, or None if it does not exist."""
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _state_stat():
+    return (_file_stat(RELIABILITY_FILE), _file_stat(EVENTS_FILE))
+
+
+def _load_snapshot() -> Dict:
+    """Read the compacted JSON, or an empty structure if missing/corrupt."""
     if RELIABILITY_FILE.exists():
         try:
-            with open(RELIABILITY_FILE, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except (json.JSONDecodeError, IOError):
+            with open(RELIABILITY_FILE, "rb") as f:
+                raw = f.read()
+            return orjson.loads(raw) if orjson else json.loads(raw)
+        except (ValueError, IOError):  # orjson.JSONDecodeError is a ValueError
             pass
     # Default empty structure
     return {
@@ -48,25 +81,12 @@ def load_reliability_data() -> Dict:
     }
 
 
-def save_reliability_data(data: Dict):
-    """Save updated reliability stats."""
-    RELIABILITY_FILE.parent.mkdir(parents=True, exist_ok=True)
-    with open(RELIABILITY_FILE, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2)
-
-
-def record_tool_reliability(
-    tool_name: str,
-    goal_id: Optional[int],
-    success: bool,
-    helpfulness: float,  # 0.0 to 1.0
-    notes: str = ""
-) -> str:
-    """Record reliability metrics after a tool call."""
-    if not tool_name:
-        return "Error: tool_name required"
-
-    data = load_reliability_data()
+def _apply_event(data: Dict, event: Dict):
+    """Fold one recorded tool call into the aggregate stats."""
+    tool_name = event["tool_name"]
+    success = event["success"]
+    helpfulness = event["helpfulness"]
+    notes = event.get("notes")
 
     # Global stats
     if tool_name not in data["global"]:
@@ -80,11 +100,14 @@ def record_tool_reliability(
     g["calls"] += 1
     if success:
         g["success_count"] += 1
-    g["helpfulness_sum"] += max(0.0, min(1.0, helpfulness))
-    if notes:
+    g["helpfulness_sum"] += helpfulness
+    # Skip empty notes and immediate repeats of the previous one
+    if notes and (not g["notes"] or g["notes"][-1] != notes):
         g["notes"].append(notes)
+        del g["notes"][:-MAX_NOTES]
 
     # Per-goal stats (if goal_id provided)
+    goal_id = event.get("goal_id")
     if goal_id is not None:
         goal_key = str(goal_id)
         if goal_key not in data["per_goal"]:
@@ -99,10 +122,128 @@ def record_tool_reliability(
         p["calls"] += 1
         if success:
             p["success_count"] += 1
-        p["helpfulness_sum"] += max(0.0, min(1.0, helpfulness))
+        p["helpfulness_sum"] += helpfulness
+
+
+def _replay_events(data: Dict, path: Path) -> int:
+    """Apply every event in a log file to `data`; returns how many were applied."""
+    events = 0
+    with open(path, "rb") as f:
+        for line in f:
+            try:
+                _apply_event(data, orjson.loads(line) if orjson else json.loads(line))
+            except (ValueError, KeyError, TypeError):
+                continue  # skip torn/malformed lines
+            events += 1
+    return events
+
 
-    save_reliability_data(data)
+def _compacting_files():
+    """Event logs set aside by a compaction, as (generation, path) pairs, oldest first."""
+    prefix = EVENTS_FILE.name + ".compacting-"
+    found = []
+    for path in EVENTS_FILE.parent.glob(prefix + "*"):
+        generation = path.name[len(prefix):]
+        if generation.isdigit():
+            found.append((int(generation), path))
+    return sorted(found)
 
+
+def load_reliability_data() -> Dict:
+    """Load the snapshot plus any logged events, reusing the cached aggregate if nothing changed on disk."""
+    stat = _state_stat()
+    if stat == _cache["stat"]:
+        return _cache["data"]
+
+    data = _load_snapshot()
+    events = 0
+    # A set-aside log newer than the snapshot's generation never made it into
+    # the snapshot (compaction was interrupted); older ones already did.
+    for generation, path in _compacting_files():
+        if generation > data.get("generation", 0):
+            events += _replay_events(data, path)
+    if EVENTS_FILE.exists():
+        events += _replay_events(data, EVENTS_FILE)
+
+    _cache.update(stat=stat, data=data, events=events)
+    return data
+
+
+def save_reliability_data(data: Dict):
+    """
+    Save the full aggregate as the new snapshot and retire the event logs it includes.
+    Crash-safe: the live log is renamed aside under the snapshot's new generation
+    before the snapshot is atomically replaced, so a restart at any point neither
+    replays events twice nor loses them.
+    """
+    RELIABILITY_FILE.parent.mkdir(parents=True, exist_ok=True)
+    generation = max([data.get("generation", 0)] + [g for g, _ in _compacting_files()]) + 1
+    tmp_file = RELIABILITY_FILE.with_name(RELIABILITY_FILE.name + ".tmp")
+    try:
+        if EVENTS_FILE.exists():
+            EVENTS_FILE.rename(EVENTS_FILE.with_name(f"{EVENTS_FILE.name}.compacting-{generation}"))
+        data["generation"] = generation
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, RELIABILITY_FILE)
+        # The snapshot now covers every set-aside log
+        for _, path in _compacting_files():
+            path.unlink(missing_ok=True)
+    except BaseException:
+        # Callers mutate the cached dict in place; don't serve it if it never hit disk.
+        _cache.update(stat=None, data=None, events=0)
+        raise
+    # What we just wrote is what the next load would read back.
+    _cache.update(stat=_state_stat(), data=data, events=0)
+
+
+def _append_event(event: Dict):
+    """Append one record to the event log (O(1) I/O per call)."""
+    EVENTS_FILE.parent.mkdir(parents=True, exist_ok=True)
+    with open(EVENTS_FILE, "a", encoding="utf-8") as f:
+        f.write(json.dumps(event) + "\n")
+
+
+def _compact():
+    """Fold pending events into the JSON snapshot."""
+    if _cache["events"]:
+        save_reliability_data(load_reliability_data())
+
+
+atexit.register(_compact)
+
+
+def record_tool_reliability(
+    tool_name: str,
+    goal_id: Optional[int],
+    success: bool,
+    helpfulness: float,  # 0.0 to 1.0
+    notes: str = ""
+) -> str:
+    """Record reliability metrics after a tool call."""
+    if not tool_name:
+        return "Error: tool_name required"
+
+    data = load_reliability_data()
+
+    event = {
+        "tool_name": tool_name,
+        "goal_id": goal_id,
+        "success": bool(success),
+        "helpfulness": max(0.0, min(1.0, helpfulness)),
+        "notes": notes
+    }
+    _append_event(event)
+    _apply_event(data, event)
+    # The in-memory aggregate already includes this event; no need to replay it.
+    _cache.update(stat=_state_stat(), events=_cache["events"] + 1)
+
+    if _cache["events"] >= COMPACT_EVERY:
+        _compact()
+
+    g = data["global"][tool_name]
     success_pct = (g["success_count"] / g["calls"] * 100) if g["calls"] > 0 else 0
     avg_help = g["helpfulness_sum"] / g["calls"] if g["calls"] > 0 else 0
 
@@ -114,36 +255,37 @@ def record_tool_reliability(
     )
 
 
-def list_tool_reliability(goal_id: Optional[int] = None, include_global: bool = True) -> str:
-    """Show reliability stats for tools, optionally filtered to a specific goal."""
+def _format_tool_stats(tool_stats: Dict) -> list:
+    """One display line per tool, most-called first."""
+    lines = []
+    for tool, stats in sorted(tool_stats.items(), key=lambda x: x[1]["calls"], reverse=True):
+        calls = stats["calls"]
+        success_pct = (stats["success_count"] / calls * 100) if calls > 0 else 0
+        avg_help = stats["helpfulness_sum"] / calls if calls > 0 else 0
+        lines.append(
+            f"  • {tool}: {calls} calls, {success_pct:.1f}% success, "
+            f"avg helpfulness {avg_help:.2f}"
+        )
+    return lines
+
+
+@functools.lru_cache(maxsize=8)
+def _render_reliability(state_stat, goal_id: Optional[int], include_global: bool) -> str:
+    """Render the listing; `state_stat` is only part of the cache key, so any file change misses."""
     data = load_reliability_data()
 
     lines = []
 
     if include_global and data["global"]:
         lines.append("Global tool reliability:")
-        for tool, stats in sorted(data["global"].items(), key=lambda x: x[1]["calls"], reverse=True):
-            calls = stats["calls"]
-            success_pct = (stats["success_count"] / calls * 100) if calls > 0 else 0
-            avg_help = stats["helpfulness_sum"] / calls if calls > 0 else 0
-            lines.append(
-                f"  • {tool}: {calls} calls, {success_pct:.1f}% success, "
-                f"avg helpfulness {avg_help:.2f}"
-            )
+        lines.extend(_format_tool_stats(data["global"]))
         lines.append("")
 
     if goal_id is not None:
         goal_key = str(goal_id)
         if goal_key in data["per_goal"] and data["per_goal"][goal_key]:
             lines.append(f"Goal {goal_id} specific tool reliability:")
-            for tool, stats in sorted(data["per_goal"][goal_key].items(), key=lambda x: x[1]["calls"], reverse=True):
-                calls = stats["calls"]
-                success_pct = (stats["success_count"] / calls * 100) if calls > 0 else 0
-                avg_help = stats["helpfulness_sum"] / calls if calls > 0 else 0
-                lines.append(
-                    f"  • {tool}: {calls} calls, {success_pct:.1f}% success, "
-                    f"avg helpfulness {avg_help:.2f}"
-                )
+            lines.extend(_format_tool_stats(data["per_goal"][goal_key]))
         else:
             lines.append(f"No per-goal data for goal {goal_id} yet.")
 
@@ -153,6 +295,11 @@ def list_tool_reliability(goal_id: Optional[int] = None, include_global: bool =
     return "\n".join(lines)
 
 
+def list_tool_reliability(goal_id: Optional[int] = None, include_global: bool = True) -> str:
+    """Show reliability stats for tools, optionally filtered to a specific goal."""
+    return _render_reliability(_state_stat(), goal_id, include_global)
+
+
 # ─── Tool Schemas ──────────────────────────────────────────────────────────
 
 RELIABILITY_TOOLS = [
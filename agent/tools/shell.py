@@ -4,9 +4,12 @@ Safe, read-only shell execution tools for the agent.
 All commands are restricted to inspection/listing/search operations.
 """
 
+import re
+import signal
 import subprocess
 import shlex
-from typing import Dict, Any, Optional
+import time
+from typing import Dict, Any, List, Optional
 
 ALLOWED_PREFIXES = [
     "ls", "dir", "tree", "find", "grep", "rg", "cat", "head", "tail", "wc",
@@ -14,6 +17,51 @@ ALLOWED_PREFIXES = [
     "echo", "pwd", "date"
 ]
 
+# Wall-clock budget for a whole pipeline, in seconds
+SHELL_TIMEOUT = 10
+
+# One alternation over ALLOWED_PREFIXES, matched as whole words
+# (so "ls" no longer admits "lsof").
+_ALLOWED_RE = re.compile(
+    r"^\s*(?:"
+    + "|".join(r"\s+".join(map(re.escape, p.split())) for p in ALLOWED_PREFIXES)
+    + r")(?:\s|$)"
+)
+
+# git branch/remote may only list: any other flag or argument can create,
+# rename, delete or reconfigure something.
+_GIT_BRANCH_LIST_FLAGS = {
+    "-a", "--all", "-r", "--remotes", "-v", "-vv", "--verbose",
+    "-l", "--list", "--show-current", "--color", "--no-color", "--no-column"
+}
+_GIT_REMOTE_LIST_FLAGS = {"-v", "--verbose"}
+
+
+def _is_read_only_git(args: List[str]) -> bool:
+    """
+    Extra check for git stages (other commands pass through): branch and remote
+    only with listing flags, and no --output (which writes a file) anywhere.
+    """
+    if args[0] != "git":
+        return True
+    subcommand, rest = args[1], args[2:]
+    # git accepts unambiguous abbreviations, so "--out=" is --output too
+    if any(a.startswith("--ou") for a in rest):
+        return False
+    if subcommand == "branch":
+        # Positional arguments are only patterns when listing explicitly
+        listing = "-l" in rest or "--list" in rest
+        return all(
+            a in _GIT_BRANCH_LIST_FLAGS
+            or a.startswith(("--sort=", "--format="))
+            or (listing and not a.startswith("-"))
+            for a in rest
+        )
+    if subcommand == "remote":
+        return all(a in _GIT_REMOTE_LIST_FLAGS for a in rest)
+    return True
+
+
 def execute_shell_tool(tool_name: str, args: Dict[str, Any], current_goal_id: Optional[int] = None) -> str:
     """
     Dispatcher for shell-related tools.
@@ -25,44 +73,56 @@ def execute_shell_tool(tool_name: str, args: Dict[str, Any], current_goal_id: Op
         return f"Unknown shell tool: {tool_name}"
 
 
-def run_pipeline(cmd: str) -> str:
+def run_pipeline(segments: List[List[str]]) -> str:
     """
     Execute a pipeline of commands (e.g., "cmd1 | cmd2 | cmd3") securely.
+    Takes the already shlex-split argv of each stage.
     Each command must be in the allowed list.
     """
-    parts = [p.strip() for p in cmd.split("|")]  # Split on |
+    segments = [args for args in segments if args]
+    # Validate every stage before spawning anything
+    for args in segments:
+        if not _ALLOWED_RE.match(" ".join(args)):
+            raise ValueError(f"Command '{args[0]}' is not allowed")
+        if not _is_read_only_git(args):
+            raise ValueError(f"Only read-only git commands are allowed: '{' '.join(args)}'")
+
     processes = []
     prev_stdout = None
 
-    for part in parts:
-        args = shlex.split(part)  # Safely split into args
-        if not args:
-            continue
-        if not any(args[0].strip().startswith(prefix) for prefix in ALLOWED_PREFIXES):
-            raise ValueError(f"Command '{args[0]}' is not allowed")
-
-        if prev_stdout is None:
-            # First command in pipeline
-            p = subprocess.Popen(args, stdout=subprocess.PIPE, text=True)
-        else:
-            # Subsequent commands
-            p = subprocess.Popen(args, stdin=prev_stdout, stdout=subprocess.PIPE, text=True)
+    for args in segments:
+        # First command inherits stdin; later ones read the previous stage's pipe
+        p = subprocess.Popen(args, stdin=prev_stdout, stdout=subprocess.PIPE, text=True)
+        if prev_stdout is not None:
+            # The child holds its own copy; closing ours lets the upstream
+            # stage get SIGPIPE if this one exits early (e.g. "| head").
+            prev_stdout.close()
         processes.append(p)
         prev_stdout = p.stdout
 
-    # Wait for all processes and collect output
-    output = ""
-    for p in processes:
-        stdout, stderr = p.communicate()
-        if stdout:
-            output += stdout
-        if stderr:
-            output += f"Error: {stderr}"
+    if not processes:
+        return ""
 
-    # Check for errors in any process
+    # Intermediate stages stream into each other through OS pipes,
+    # so only the last stage's output is read here.
+    last = processes[-1]
+    deadline = time.monotonic() + SHELL_TIMEOUT
+    try:
+        output, _ = last.communicate(timeout=SHELL_TIMEOUT)
+        for p in processes[:-1]:
+            p.wait(timeout=max(0.0, deadline - time.monotonic()))
+    except subprocess.TimeoutExpired:
+        for p in processes:
+            p.kill()
+        for p in processes:
+            p.wait()
+        raise
+
+    # Check for errors in any process; an upstream stage killed by SIGPIPE
+    # only means a later stage stopped reading.
     for p in processes:
-        if p.returncode != 0:
-            raise subprocess.CalledProcessError(p.returncode, " ".join(p.args))
+        if p.returncode != 0 and not (p is not last and p.returncode == -signal.SIGPIPE):
+            raise subprocess.CalledProcessError(p.returncode, " ".join(p.args), output=output)
 
     return output
 
@@ -79,10 +139,8 @@ def run_safe_shell(cmd: str) -> str:
         return "Error: empty command"
 
     # Basic prefix check (first word)
-    first_word = shlex.split(cmd)[0] if cmd.strip() else ""
-    allowed = any(cmd.strip().startswith(prefix) for prefix in ALLOWED_PREFIXES)
-
-    if not allowed:
+    first_word = cmd.split(None, 1)[0]  # no lexing needed for one word
+    if not _ALLOWED_RE.match(cmd):
         return (
             f"Error: Command not allowed for safety reasons.\n"
             f"Allowed prefixes: {', '.join(ALLOWED_PREFIXES)}\n"
@@ -90,13 +148,14 @@ def run_safe_shell(cmd: str) -> str:
         )
 
     try:
-        result = run_pipeline(cmd)
+        # Lex each pipeline stage exactly once
+        result = run_pipeline([shlex.split(part) for part in cmd.split("|")])
 
         output = f"output: {result}\n"
         return output or "(no output)"
 
     except subprocess.TimeoutExpired:
-        return f"Command timed out after 10 seconds: {cmd}"
+        return f"Command timed out after {SHELL_TIMEOUT} seconds: {cmd}"
     except subprocess.CalledProcessError as e:
         return f"Execution error:\n{e.stderr or e.stdout}"
     except FileNotFoundError:
@@ -114,7 +173,8 @@ SHELL_TOOLS = [
             "name": "run_safe_shell",
             "description": (
                 "Run a safe, read-only shell command to inspect files or repo state. "
-                "Only allowed: ls, grep, rg, find, cat, head, tail, wc, git status/diff/log/branch/remote. "
+                "Only allowed: ls, grep, rg, find, cat, head, tail, wc, git status/diff/log, "
+                "and listing forms of git branch/remote. "
                 "No write, delete, install, or dangerous commands permitted."
             ),
             "parameters": {